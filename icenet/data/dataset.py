@@ -1,8 +1,13 @@
 import argparse
+import copy
 import json
 import logging
 import os
 
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import dask
 import numpy as np
 import pandas as pd
@@ -15,6 +20,17 @@ from icenet.utils import setup_logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# Supported dataset dtypes, resolved directly rather than via getattr(np, ...)
+DTYPES = {
+    name: np.dtype(name)
+    for name in ("float16", "float32", "float64", "int8")
+}
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
 pytorch_available = False
 try:
     from torch.utils.data import Dataset
@@ -32,6 +48,37 @@ tf-data-vs-keras-utils-sequence-performance
 """
 
 
+@lru_cache(maxsize=32)
+def _parse_configuration(path: str, mtime: int) -> dict:
+    """Parses a JSON configuration, using orjson if it is available.
+
+    Args:
+        path: The path to the JSON configuration file.
+        mtime: The modification time of the file, so that the cache is
+            invalidated if the configuration is regenerated.
+
+    Returns:
+        The parsed configuration.
+    """
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def read_configuration(path: str) -> dict:
+    """Reads a JSON configuration file, caching the parsed result.
+
+    Args:
+        path: The path to the JSON configuration file.
+
+    Returns:
+        A copy of the parsed configuration, safe for the caller to modify.
+    """
+    path = os.path.abspath(path)
+    return copy.deepcopy(
+        _parse_configuration(path, os.stat(path).st_mtime_ns))
+
+
 class IceNetDataSet(SplittingMixin, DataCollection):
     """Initialises and configures a dataset.
 
@@ -44,6 +91,7 @@ class IceNetDataSet(SplittingMixin, DataCollection):
         _batch_size: The batch size for the data loader.
         _counts: A dict with number of elements in train, val, test.
         _dtype: The type of the dataset.
+        _io_dtype: The type the dataset inputs are stored as in tfrecords.
         _loader_config: The path to the data loader configuration file.
         _generate_workers: An integer representing number of workers for parallel processing with Dask.
         _n_forecast_days: An integer representing number of days to predict for.
@@ -85,7 +133,8 @@ class IceNetDataSet(SplittingMixin, DataCollection):
 
         self._batch_size = batch_size
         self._counts = self._config["counts"]
-        self._dtype = getattr(np, self._config["dtype"])
+        self._dtype = DTYPES[self._config["dtype"]]
+        self._io_dtype = self._config.get("io_dtype", "float32")
         self._loader_config = self._config["loader_config"]
         self._generate_workers = self._config["generate_workers"]
         self._n_forecast_days = self._config["n_forecast_days"]
@@ -122,10 +171,7 @@ class IceNetDataSet(SplittingMixin, DataCollection):
         if os.path.exists(path):
             logging.info("Loading configuration {}".format(path))
 
-            with open(path, "r") as fh:
-                obj = json.load(fh)
-
-                self._config.update(obj)
+            self._config.update(read_configuration(path))
         else:
             raise OSError("{} not found".format(path))
 
@@ -156,6 +202,7 @@ class IceNetDataSet(SplittingMixin, DataCollection):
             n_forecast_days=n_forecast_days,
             generate_workers=generate_workers,
             dataset_config_path=os.path.dirname(self._configuration_path),
+            io_dtype=self._io_dtype,
             loss_weight_days=self._config["loss_weight_days"],
             north=self.north,
             output_batch_size=self._config["output_batch_size"],
@@ -200,7 +247,7 @@ class MergedIceNetDataSet(SplittingMixin, DataCollection):
         self._config = dict()
         self._configuration_paths = [configuration_paths] \
             if type(configuration_paths) != list else configuration_paths
-        self._load_configurations(configuration_paths)
+        self._load_configurations(self._configuration_paths)
 
         identifier = ".".join(
             [loader.identifier for loader in self._config["loaders"]])
@@ -214,7 +261,8 @@ class MergedIceNetDataSet(SplittingMixin, DataCollection):
 
         self._base_path = path
         self._batch_size = batch_size
-        self._dtype = getattr(np, self._config["dtype"])
+        self._dtype = DTYPES[self._config["dtype"]]
+        self._io_dtype = self._config["io_dtype"]
         self._num_channels = self._config["num_channels"]
         self._n_forecast_days = self._config["n_forecast_days"]
         self._shape = self._config["shape"]
@@ -226,11 +274,21 @@ class MergedIceNetDataSet(SplittingMixin, DataCollection):
         """
 
         """
-        for idx, loader_path in enumerate(self._config["loader_paths"]):
-            hemi = self._config["loaders"][idx].hemisphere_str[0]
-            base_path = os.path.join(self._base_path,
-                                     self._config["loaders"][idx].identifier)
-            self.add_records(base_path, hemi)
+        seen = set()
+
+        for loader in self._config["loaders"]:
+            record_location = (os.path.join(self._base_path,
+                                            loader.identifier),
+                               loader.hemisphere_str[0])
+
+            # Each location is globbed once, and its records only added once
+            if record_location in seen:
+                logging.debug("Records already added for {}".format(
+                    record_location))
+                continue
+
+            seen.add(record_location)
+            self.add_records(*record_location)
 
     def _load_configurations(self, paths: object):
         """
@@ -242,34 +300,52 @@ class MergedIceNetDataSet(SplittingMixin, DataCollection):
                             north=False,
                             south=False)
 
-        for path in paths:
-            if os.path.exists(path):
-                logging.info("Loading configuration {}".format(path))
+        if not len(paths):
+            raise ValueError("No dataset configuration paths provided")
 
-                with open(path, "r") as fh:
-                    obj = json.load(fh)
-                    self._merge_configurations(path, obj)
-            else:
+        for path in paths:
+            if not os.path.exists(path):
                 raise OSError("{} not found".format(path))
 
-    def _merge_configurations(self, path: str, other: object):
+        # Reading configurations and creating loaders is I/O bound, so can be
+        # overlapped, but merging has to remain in order
+        with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+            prepared = list(executor.map(self._prepare_configuration, paths))
+
+        for path, other, loader in prepared:
+            self._merge_configurations(path, other, loader)
+
+    @staticmethod
+    def _prepare_configuration(path: str) -> tuple:
         """
 
         :param path:
-        :param other:
+        :return: tuple of path, configuration and loader
         """
+        logging.info("Loading configuration {}".format(path))
+        other = read_configuration(path)
+
         loader = IceNetDataLoaderFactory().create_data_loader(
             "dask",
             other["loader_config"],
             other["identifier"],
             other["var_lag"],
             dataset_config_path=os.path.dirname(path),
+            io_dtype=other.get("io_dtype", "float32"),
             loss_weight_days=other["loss_weight_days"],
             north=other["north"],
             output_batch_size=other["output_batch_size"],
             south=other["south"],
             var_lag_override=other["var_lag_override"])
+        return path, other, loader
+
+    def _merge_configurations(self, path: str, other: object, loader: object):
+        """
 
+        :param path:
+        :param other:
+        :param loader:
+        """
         self._config["loaders"].append(loader)
 
         if "loader_path" in other:
@@ -280,15 +356,17 @@ class MergedIceNetDataSet(SplittingMixin, DataCollection):
             self._config["loader_paths"].append(other["dataset_path"])
 
         if "counts" not in self._config:
-            self._config["counts"] = other["counts"].copy()
+            self._config["counts"] = Counter(other["counts"])
         else:
-            for dataset, count in other["counts"].items():
-                logging.info("Merging {} samples from {}".format(
-                    count, dataset))
-                self._config["counts"][dataset] += count
+            logging.info("Merging samples from {}: {}".format(
+                path, other["counts"]))
+            self._config["counts"].update(other["counts"])
+
+        # Configurations predating reduced precision storage are float32
+        other.setdefault("io_dtype", "float32")
 
         general_attrs = [
-            "channels", "dtype", "n_forecast_days", "num_channels",
+            "channels", "dtype", "io_dtype", "n_forecast_days", "num_channels",
             "output_batch_size", "shape"
         ]
 
@@ -10,7 +10,8 @@ def get_decoder(shape: object,
                 channels: object,
                 forecasts: object,
                 num_vars: int = 1,
-                dtype: str = "float32") -> object:
+                dtype: str = "float32",
+                io_dtype: str = "float32") -> object:
     """Returns a decoder function used for parsing and decoding data from tfrecord protocol buffer.
 
     Args:
@@ -19,12 +20,17 @@ def get_decoder(shape: object,
         forecasts: The number of days to forecast in prediction
         num_vars (optional): The number of variables in the input data. Defaults to 1.
         dtype (optional): The data type of the input data. Defaults to "float32".
+        io_dtype (optional): The data type the inputs were stored as. If this is
+            not "float32" the inputs are stored as serialised tensors, which are
+            cast to `dtype` on decoding. Defaults to "float32".
 
     Returns:
         A function that can be used to parse and decode data. It takes in a protocol buffer
             (tfrecord) as input and returns the parsed and decoded data.
     """
-    xf = tf.io.FixedLenFeature([*shape, channels], getattr(tf, dtype))
+    reduced_precision = io_dtype != "float32"
+    xf = tf.io.FixedLenFeature([], tf.string) if reduced_precision else \
+        tf.io.FixedLenFeature([*shape, channels], getattr(tf, dtype))
     yf = tf.io.FixedLenFeature([*shape, forecasts, num_vars],
                                getattr(tf, dtype))
     sf = tf.io.FixedLenFeature([*shape, forecasts, num_vars],
@@ -39,7 +45,13 @@ def get_decoder(shape: object,
         }
 
         item = tf.io.parse_example(proto, features)
-        return item['x'], item['y'], item['sample_weights']
+        x = item['x']
+
+        if reduced_precision:
+            x = tf.io.parse_tensor(x, getattr(tf, io_dtype))
+            x = tf.cast(tf.ensure_shape(x, [*shape, channels]),
+                        getattr(tf, dtype))
+        return x, item['y'], item['sample_weights']
 
     return decode_item
 
@@ -62,6 +74,7 @@ class SplittingMixin:
     """
     _batch_size: int
     _dtype: object
+    _io_dtype: str
     _num_channels: int
     _n_forecast_days: int
     _shape: int
@@ -160,7 +173,8 @@ class SplittingMixin:
         decoder = get_decoder(self.shape,
                               self.num_channels,
                               self.n_forecast_days,
-                              dtype=self.dtype.__name__)
+                              dtype=self.dtype.name,
+                              io_dtype=self.io_dtype)
 
         if self.shuffling:
             logging.info("Training dataset(s) marked to be shuffled")
@@ -200,7 +214,8 @@ class SplittingMixin:
         decoder = get_decoder(self.shape,
                               self.num_channels,
                               self.n_forecast_days,
-                              dtype=self.dtype.__name__)
+                              dtype=self.dtype.name,
+                              io_dtype=self.io_dtype)
 
         for df in getattr(self, "{}_fns".format(split)):
             logging.debug("Getting records from {}".format(df))
@@ -251,10 +266,15 @@ class SplittingMixin:
         return self._batch_size
 
     @property
-    def dtype(self) -> str:
-        """The dataset's data type."""
+    def dtype(self) -> object:
+        """The dataset's data type, as a numpy.dtype."""
         return self._dtype
 
+    @property
+    def io_dtype(self) -> str:
+        """The data type the dataset's inputs are stored as in tfrecords."""
+        return self._io_dtype
+
     @property
     def n_forecast_days(self) -> int:
         """The number of days to forecast in prediction."""
@@ -319,6 +319,13 @@ class ClimateDownloader(Downloader):
         var_folder = self.get_data_var_folder(var)
         group_by = "time.{}".format(self._group_dates_by) if not freq else freq
 
+        datasets, paths, to_regrid = list(), list(), list()
+
+        # One listing of the folder rather than a stat per output file, which
+        # is noticeably cheaper on networked filesystems
+        with os.scandir(var_folder) as it:
+            existing = frozenset(entry.name for entry in it)
+
         for dt, dt_da in da.groupby(group_by):
             req_date = pd.to_datetime(dt_da.time.values[0])
             latlon_path, regridded_name = \
@@ -327,11 +334,16 @@ class ClimateDownloader(Downloader):
                                        date_format=date_format)
 
             logging.info("Retrieving and saving {}".format(latlon_path))
-            dt_da.compute()
-            dt_da.to_netcdf(latlon_path)
+            datasets.append(dt_da.to_dataset())
+            paths.append(latlon_path)
+
+            if os.path.basename(regridded_name) not in existing:
+                to_regrid.append(latlon_path)
 
-            if not os.path.exists(regridded_name):
-                self._files_downloaded.append(latlon_path)
+        # Writing all the files in one call allows them to be computed and
+        # written together, rather than one file at a time
+        xr.save_mfdataset(datasets, paths)
+        self._files_downloaded.extend(to_regrid)
 
     @property
     def sic_ease_cube(self):
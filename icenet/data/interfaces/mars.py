@@ -1,26 +1,102 @@
+import concurrent
 import datetime
+import hashlib
 import logging
 import os
+import queue
+import shutil
 import sys
+import threading
+import time
 
+from concurrent.futures import ThreadPoolExecutor
 from itertools import product
 
 import ecmwfapi
+import numpy as np
 import pandas as pd
 import xarray as xr
 
 from icenet.data.cli import download_args
-from icenet.data.interfaces.downloader import ClimateDownloader
+from icenet.data.interfaces.downloader import ClimateDownloader, \
+    filter_dates_on_data
 from icenet.data.interfaces.utils import batch_requested_dates
 """
 
 """
 
 
+def scale_in_place(cube: object, factor: float):
+    """Multiply cube data by factor without allocating a new array
+
+    The mask of masked data is left untouched, only the underlying values are
+    scaled.
+
+    :param cube: iris cube with realised floating point data
+    :param factor: multiplier, pass a reciprocal rather than dividing
+    """
+    data = np.ma.getdata(cube.data)
+    np.multiply(data, factor, out=data)
+
+
+def var_levels(var_names: object, pressures: object) -> list:
+    """Expands variables against a MARS levelist
+
+    :param var_names:
+    :param pressures: slash separated pressure levels, or None for surface
+    :return: list of (var_name, pressure, var) where var is the name of the
+        output variable, e.g. zg500
+    """
+    levels = pressures.split('/') if pressures else [None]
+    return [(var_name, pressure,
+             var_name if not pressure else "{}{}".format(var_name, pressure))
+            for var_name, pressure in product(var_names, levels)]
+
+
+def level_positions(ds: object) -> dict:
+    """Maps pressure levels to their position along the level dimension
+
+    :param ds:
+    :return: dict of integer level to index, empty for surface datasets
+    """
+    if "level" not in ds.coords:
+        return {}
+    return {int(level): idx for idx, level in enumerate(ds.level.values)}
+
+
+def daily_mean(ds: object) -> object:
+    """Averages a dataset to daily values
+
+    When every day in the range is present with the same number of
+    contiguous samples, this is a fixed stride reduction via coarsen, which
+    avoids the grouping overhead of resample. Otherwise it falls back to
+    resample, which also keeps the all-NaN entries for any missing days.
+
+    :param ds:
+    :return: the daily averaged dataset
+    """
+    days = ds.indexes["time"].floor("D")
+    samples_per_day = days.value_counts()
+    no_gaps = len(samples_per_day) == (days[-1] - days[0]).days + 1
+
+    if days.is_monotonic_increasing and no_gaps and \
+            samples_per_day.nunique() == 1:
+        return ds.coarsen(time=int(samples_per_day.iloc[0])).\
+            mean(keep_attrs=True).\
+            assign_coords(time=days.unique())
+    return ds.resample(time='1D', keep_attrs=True).mean(keep_attrs=True)
+
+
 class HRESDownloader(ClimateDownloader):
     """Climate downloader to provide CMIP6 reanalysis data from ESGF APIs
 
     :param identifier: how to identify this dataset
+    :param cache_days: if set, successful retrievals are kept in a cache
+        keyed on the request for this many days, so that repeated runs don't
+        resubmit identical requests to MARS
+    :param max_requests: how many MARS requests to have in flight at once,
+        ECMWF limits the number of active jobs per user
+    :param parallel_opens: whether to open retrieved files in parallel
 
     """
 
@@ -82,10 +158,138 @@ retrieve,
   format=netcdf
     """
 
-    def __init__(self, *args, identifier: str = "mars.hres", **kwargs):
+    def __init__(self,
+                 *args,
+                 cache_days: int = None,
+                 identifier: str = "mars.hres",
+                 max_requests: int = 4,
+                 parallel_opens: bool = True,
+                 **kwargs):
         super().__init__(*args, identifier=identifier, **kwargs)
 
-        self._server = ecmwfapi.ECMWFService("mars")
+        self._cache_days = cache_days
+        self._max_requests = max_requests
+        self._parallel_opens = parallel_opens
+        self._cache_path = os.path.join(self.base_path, "request_cache")
+
+        if self._cache_days:
+            self._expire_cache()
+
+        # The ECMWF client isn't thread safe, so each thread gets its own
+        self._local = threading.local()
+
+        # Request invariants, rendered once rather than for every request
+        self._area = "/".join([str(s) for s in self.hemisphere_loc])
+        self._param_ids = {
+            var_name: "{}.{}".format(self.params[var_name][0],
+                                     self.param_table)
+            for var_name in set(self.var_names)
+        }
+
+    def _expire_cache(self):
+        """Removes cached retrievals older than the configured cache days
+
+        """
+        if not os.path.exists(self._cache_path):
+            return
+
+        cutoff = time.time() - self._cache_days * 86400
+
+        with os.scandir(self._cache_path) as it:
+            for entry in it:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    logging.debug("Expiring cached request {}".format(
+                        entry.path))
+                    os.unlink(entry.path)
+
+    def _execute_request(self, request: str, request_target: str) -> bool:
+        """Executes a MARS request, using the request cache if enabled
+
+        :param request:
+        :param request_target:
+        :return: whether request_target was successfully retrieved
+        """
+        cache_file = None
+
+        if self._cache_days:
+            # The target doesn't affect the data retrieved, so is excluded
+            key = hashlib.blake2b(
+                request.replace(request_target, "").encode(),
+                digest_size=16).hexdigest()
+            cache_file = os.path.join(self._cache_path, "{}.nc".format(key))
+
+            if os.path.exists(cache_file):
+                logging.info("Using cached retrieval {} for {}".format(
+                    cache_file, request_target))
+                shutil.copyfile(cache_file, request_target)
+                return True
+
+        logging.debug("MARS REQUEST: \n{}\n".format(request))
+
+        try:
+            self.server.execute(request, request_target)
+        except ecmwfapi.api.APIException:
+            logging.exception("Could not complete ECMWF request: {}")
+            return False
+
+        if cache_file:
+            os.makedirs(self._cache_path, exist_ok=True)
+            # Avoid a partially written file being picked up as a cache hit
+            tmp_cache_file = "{}.tmp".format(cache_file)
+            shutil.copyfile(request_target, tmp_cache_file)
+            os.replace(tmp_cache_file, cache_file)
+        return True
+
+    def _filter_dates(self, var_pairs: list, req_dates: object) -> list:
+        """Reduces the request dates to those missing for any variable
+
+        A date only needs retrieving if at least one variable doesn't
+        already have it in its regridded output. We don't consider the
+        latlon intermediates, as those are overwritten when saving.
+
+        :param var_pairs: (var_name, pressure, var) tuples from var_levels
+        :param req_dates:
+        :return: sorted list of dates to retrieve
+        """
+        download_dates = set()
+
+        for _, _, var in var_pairs:
+            latlon_path, regridded_name = \
+                self.get_req_filenames(self.get_data_var_folder(var),
+                                       req_dates[0])
+            download_dates.update(
+                filter_dates_on_data(latlon_path,
+                                     regridded_name,
+                                     req_dates,
+                                     check_latlon=False,
+                                     drop_vars=self._drop_vars))
+
+        return sorted(el.date() for el in download_dates)
+
+    def _build_request(self, var_names: object, pressures: object,
+                       date: str, target: str, **kwargs) -> str:
+        """Renders the MARS request for a single retrieval
+
+        Surface and pressure level variables are retrieved separately, as
+        the web API returns a single file per request and the netCDF output
+        for each level type can't be concatenated into it.
+
+        :param var_names:
+        :param pressures:
+        :param date: MARS formatted date(s) to retrieve
+        :param target:
+        :param kwargs: any further template fields, e.g. step
+        :return: the request
+        """
+        return self.mars_template.format(
+            area=self._area,
+            date=date,
+            levtype="plev" if pressures else "sfc",
+            levlist="levelist={},\n  ".format(pressures)
+            if pressures else "",
+            params="/".join([self._param_ids[v] for v in var_names]),
+            target=target,
+            **kwargs)
 
     def _single_download(self, var_names: object, pressures: object,
                          req_dates: object):
@@ -96,12 +300,35 @@ retrieve,
         :param req_dates:
         :return:
         """
+        downloads = self._retrieve(var_names, pressures, req_dates)
+
+        if downloads:
+            self._process(var_names, pressures, downloads)
+
+    def _retrieve(self, var_names: object, pressures: object,
+                  req_dates: object) -> list:
+        """Retrieves the monthly files covering the requested dates
+
+        :param var_names:
+        :param pressures:
+        :param req_dates:
+        :return: list of retrieved files, empty if there's nothing to process
+        """
 
         for dt in req_dates:
             assert dt.year == req_dates[0].year
 
+        req_dates = self._filter_dates(var_levels(var_names, pressures),
+                                       req_dates)
+
+        if not len(req_dates):
+            logging.info("No requested dates remain, likely already present")
+            return []
+
         downloads = []
         levtype = "plev" if pressures else "sfc"
+        # Captured once so every batch is judged against the same day
+        today = datetime.datetime.now(datetime.timezone.utc).date()
 
         for req_batch in batch_requested_dates(req_dates, attribute="month"):
             req_batch = sorted(req_batch)
@@ -109,8 +336,7 @@ retrieve,
 
             logging.info("Downloading month file {}".format(request_month))
 
-            if req_batch[-1] - datetime.datetime.utcnow().date() == \
-                    datetime.timedelta(days=-1):
+            if req_batch[-1] - today == datetime.timedelta(days=-1):
                 logging.warning("Not allowing partial requests at present, "
                                 "removing {}".format(req_batch[-1]))
                 req_batch = req_batch[:-1]
@@ -121,17 +347,11 @@ retrieve,
 
             os.makedirs(os.path.dirname(request_target), exist_ok=True)
 
-            request = self.mars_template.format(
-                area="/".join([str(s) for s in self.hemisphere_loc]),
-                date="/".join([el.strftime("%Y%m%d") for el in req_batch]),
-                levtype=levtype,
-                levlist="levelist={},\n  ".format(pressures)
-                if pressures else "",
-                params="/".join([
-                    "{}.{}".format(self.params[v][0], self.param_table)
-                    for v in var_names
-                ]),
-                target=request_target,
+            request = self._build_request(
+                var_names,
+                pressures,
+                "/".join([el.strftime("%Y%m%d") for el in req_batch]),
+                request_target,
                 # We are only allowed date prior to -24 hours ago, dynamically
                 # retrieve if date is today
                 # TODO: too big - step="/".join([str(i) for i in range(24)]),
@@ -139,38 +359,46 @@ retrieve,
             )
 
             if not os.path.exists(request_target):
-                logging.debug("MARS REQUEST: \n{}\n".format(request))
-
-                try:
-                    self._server.execute(request, request_target)
-                except ecmwfapi.api.APIException:
-                    logging.exception("Could not complete ECMWF request: {}")
-                else:
+                if self._execute_request(request, request_target):
                     downloads.append(request_target)
             else:
                 logging.debug("Already have {}".format(request_target))
                 downloads.append(request_target)
 
         logging.debug("Files downloaded: {}".format(downloads))
+        return downloads
 
-        ds = xr.open_mfdataset(downloads)
-        ds = ds.resample(time='1D', keep_attrs=True).mean(keep_attrs=True)
-
-        for var_name, pressure in product(
-                var_names,
-                pressures.split('/') if pressures else [None]):
-            var = var_name if not pressure else \
-                "{}{}".format(var_name, pressure)
+    def _process(self, var_names: object, pressures: object,
+                 downloads: list):
+        """Daily averages retrieved files and saves them per variable
 
+        :param var_names:
+        :param pressures:
+        :param downloads: files returned by _retrieve
+        """
+        # Each monthly file forms a chunk, aligning with the daily stride
+        ds = xr.open_mfdataset(downloads,
+                               combine="by_coords",
+                               parallel=self._parallel_opens)
+        ds = daily_mean(ds)
+        level_idx = level_positions(ds)
+
+        for var_name, pressure, var in var_levels(var_names, pressures):
             da = getattr(ds, self.params[var_name][1])
 
             if pressure:
-                da = da.sel(level=int(pressure))
+                da = da.isel(level=level_idx[int(pressure)])
 
             self.save_temporal_files(var, da)
 
         ds.close()
+        self._remove_downloads(downloads)
+
+    def _remove_downloads(self, downloads: list):
+        """
 
+        :param downloads:
+        """
         if self.delete:
             for downloaded_file in downloads:
                 if os.path.exists(downloaded_file):
@@ -202,12 +430,65 @@ retrieve,
             batch_requested_dates(self._dates,
                                   attribute=self.group_dates_by)
 
+        requests = list()
+
         for req_batch in dates_per_request:
             if len(sfc_vars) > 0:
-                self._single_download(sfc_vars, None, req_batch)
+                requests.append((sfc_vars, None, req_batch))
 
             if len(level_vars) > 0:
-                self._single_download(level_vars, levels, req_batch)
+                requests.append((level_vars, levels, req_batch))
+
+        if not len(requests):
+            logging.info("No requests to make for the dates specified")
+            return
+
+        # Retrievals are handed to a single processing thread, so the network
+        # and the daily averaging overlap. The bounded queue stops retrieved
+        # files piling up on disk if processing falls behind
+        retrieved = queue.Queue(maxsize=2)
+
+        def process_retrieved():
+            while True:
+                item = retrieved.get()
+
+                if item is None:
+                    break
+
+                try:
+                    self._process(*item)
+                except Exception as e:
+                    logging.exception("Processing failure: {}".format(e))
+
+        def retrieve(var_names, pressures, req_batch):
+            downloads = self._retrieve(var_names, pressures, req_batch)
+
+            if downloads:
+                retrieved.put((var_names, pressures, downloads))
+
+        processor = threading.Thread(target=process_retrieved)
+        processor.start()
+
+        # Requests spend most of their time queued at ECMWF, so overlap them
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(requests),
+                                                    self._max_requests)) \
+                    as executor:
+                futures = []
+
+                for var_names, pressures, req_batch in requests:
+                    future = executor.submit(retrieve, var_names, pressures,
+                                             req_batch)
+                    futures.append(future)
+
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.exception("Thread failure: {}".format(e))
+        finally:
+            retrieved.put(None)
+            processor.join()
 
         logging.info("{} daily files downloaded".format(
             len(self._files_downloaded)))
@@ -224,9 +505,13 @@ retrieve,
         if var_name == 'tos':
             # Overwrite maksed values with zeros
             logging.debug("MARS additional regrid: {}".format(var_name))
-            cube_ease.data[cube_ease.data.mask] = 0.
-            cube_ease.data[:, self._masks.get_land_mask()] = 0.
-            cube_ease.data = cube_ease.data.data
+            # Single pass over the data for both masked and land cells, the
+            # land mask broadcasting across time
+            data = cube_ease.data
+            zero_cells = np.logical_or(np.ma.getmaskarray(data),
+                                       self._masks.get_land_mask())
+            np.copyto(data.data, 0., where=zero_cells)
+            cube_ease.data = data.data
 
         if var_name in ['rlds', 'rsds']:
             # FIXME: We're taking the mean across the hourly samples for the
@@ -238,13 +523,19 @@ retrieve,
             #  should work in the meantime
             #
             #  FIXME FIXME FIXME
-            cube_ease /= 12.
+            scale_in_place(cube_ease, 1. / 12.)
 
         if var_name.startswith("zg"):
             # https://apps.ecmwf.int/codes/grib/param-db/?id=129
             #
             # We want the geopotential height as per ERA5
-            cube_ease /= 9.80665
+            scale_in_place(cube_ease, 1. / 9.80665)
+
+    @property
+    def server(self):
+        if not hasattr(self._local, "server"):
+            self._local.server = ecmwfapi.ECMWFService("mars")
+        return self._local.server
 
     @property
     def mars_template(self):
@@ -283,14 +574,14 @@ retrieve,
     grid=0.25/0.25,
     area={area}"""
 
-    def _single_download(self, var_names: object, pressures: object,
-                         req_dates: object):
-        """
+    def _retrieve(self, var_names: object, pressures: object,
+                  req_dates: object) -> list:
+        """Retrieves a file per requested date
 
         :param var_names:
         :param pressures:
         :param req_dates:
-        :return:
+        :return: list of retrieved files
         """
 
         for dt in req_dates:
@@ -309,59 +600,47 @@ retrieve,
                 "{}.{}.nc".format(levtype, request_day))
             os.makedirs(os.path.dirname(request_target), exist_ok=True)
 
-            request = self.mars_template.format(
-                area="/".join([str(s) for s in self.hemisphere_loc]),
-                date=req_date.strftime("%Y-%m-%d"),
-                levtype=levtype,
-                levlist="levelist={},\n  ".format(pressures)
-                if pressures else "",
-                params="/".join([
-                    "{}.{}".format(self.params[v][0], self.param_table)
-                    for v in var_names
-                ]),
-                target=request_target,
-            )
+            request = self._build_request(var_names, pressures,
+                                          req_date.strftime("%Y-%m-%d"),
+                                          request_target)
 
             if not os.path.exists(request_target):
-                logging.debug("MARS REQUEST: \n{}\n".format(request))
-
-                try:
-                    self._server.execute(request, request_target)
-                except ecmwfapi.api.APIException:
-                    logging.exception("Could not complete ECMWF request: {}")
-                else:
+                if self._execute_request(request, request_target):
                     downloads.append(request_target)
             else:
                 logging.debug("Already have {}".format(request_target))
                 downloads.append(request_target)
 
         logging.debug("Files downloaded: {}".format(downloads))
+        return downloads
+
+    def _process(self, var_names: object, pressures: object,
+                 downloads: list):
+        """Averages the ensemble members of each retrieved file and saves them
+
+        :param var_names:
+        :param pressures:
+        :param downloads: files returned by _retrieve
+        """
+        var_pairs = var_levels(var_names, pressures)
 
         for download_filename in downloads:
             logging.info("Processing {}".format(download_filename))
             ds = xr.open_dataset(download_filename)
             ds = ds.mean("number")
+            level_idx = level_positions(ds)
 
-            for var_name, pressure in product(
-                    var_names,
-                    pressures.split('/') if pressures else [None]):
-                var = var_name if not pressure else \
-                    "{}{}".format(var_name, pressure)
-
+            for var_name, pressure, var in var_pairs:
                 da = getattr(ds, self.params[var_name][1])
 
                 if pressure:
-                    da = da.sel(level=int(pressure))
+                    da = da.isel(level=level_idx[int(pressure)])
 
                 self.save_temporal_files(var, da, date_format="%Y%m%d")
 
             ds.close()
 
-        if self.delete:
-            for downloaded_file in downloads:
-                if os.path.exists(downloaded_file):
-                    logging.info("Removing {}".format(downloaded_file))
-                    os.unlink(downloaded_file)
+        self._remove_downloads(downloads)
 
     def save_temporal_files(self, var, da, date_format=None, freq=None):
         """
@@ -388,7 +667,17 @@ retrieve,
 
 
 def main(identifier, extra_kwargs=None):
-    args = download_args()
+    args = download_args(extra_args=(
+        (("-cd", "--cache-days"),
+         dict(dest="cache_days",
+              help="Cache retrievals for this many days",
+              type=int,
+              default=None)),
+        (("-w", "--workers"),
+         dict(help="Concurrent MARS requests, which ECMWF limits per user",
+              type=int,
+              default=4)),
+    ))
 
     logging.info("ECMWF {} Data Downloading".format(identifier))
     cls = getattr(sys.modules[__name__], "{}Downloader".format(identifier))
@@ -397,6 +686,7 @@ def main(identifier, extra_kwargs=None):
         extra_kwargs = dict()
 
     instance = cls(
+        cache_days=args.cache_days,
         identifier="mars.{}".format(identifier.lower()),
         var_names=args.vars,
         dates=[
@@ -405,6 +695,8 @@ def main(identifier, extra_kwargs=None):
         ],
         delete_tempfiles=args.delete,
         levels=args.levels,
+        max_requests=args.workers,
+        parallel_opens=args.parallel_opens,
         north=args.hemisphere == "north",
         south=args.hemisphere == "south",
         **extra_kwargs)
@@ -10,6 +10,25 @@ import xarray as xr
 from icenet.utils import setup_logging
 
 
+def write_netcdf_files(writes: list):
+    """Writes xarray objects to separate netCDF files in a single operation
+
+    The objects are typically slices of one lazily opened dataset, so rather
+    than writing concurrently from threads, which would share reads through
+    the netCDF/HDF5 libraries, all files are written from one dask graph.
+
+    :param writes: list of (xarray object, output path) tuples
+    """
+    if not len(writes):
+        return
+
+    datasets = [
+        obj.to_dataset() if isinstance(obj, xr.DataArray) else obj
+        for obj, _ in writes
+    ]
+    xr.save_mfdataset(datasets, [path for _, path in writes])
+
+
 def batch_requested_dates(dates: object, attribute: str = "month") -> object:
     """
 
@@ -103,19 +122,22 @@ def reprocess_monthlies(source: str,
 
             ds = ds.rename({k: var_name for k in var_names})
             da = getattr(ds, var_name)
+            daily_writes = []
 
-            for date in da.time.values:
+            for idx, date in enumerate(da.time.values):
                 date = pd.Timestamp(date)
                 fname = '{:04d}_{:02d}_{:02d}.nc'. \
                     format(date.year, date.month, date.day)
-                daily = da.sel(time=slice(date, date))
+                daily = da.isel(time=[idx])
 
                 output_path = os.path.join(destination, fname)
 
                 if dry or os.path.exists(output_path):
                     continue
                 else:
-                    daily.to_netcdf(output_path)
+                    daily_writes.append((daily, output_path))
+
+            write_netcdf_files(daily_writes)
 
 
 def add_time_dim(source: str,
@@ -180,20 +202,23 @@ def add_time_dim(source: str,
                     pd.Timestamp(el) for el in ds.indexes['time'].normalize()
                 ]
 
-            for d in ds.time.values:
+            daily_writes = []
+
+            for idx, d in enumerate(ds.time.values):
                 dt = pd.to_datetime(d)
                 date_str = dt.strftime("%Y_%m_%d")
                 fpath = os.path.join(
                     os.path.split(year_files[0])[0], "{}.nc".format(date_str))
 
                 if not os.path.exists(fpath):
-                    dw = ds.sel(time=slice(dt, dt))
+                    dw = ds.isel(time=[idx])
 
                     logging.info("Writing {}".format(fpath))
-                    dw.to_netcdf(fpath)
+                    daily_writes.append((dw, fpath))
                 else:
                     raise RuntimeError("Already exists: {}".format(fpath))
 
+            write_netcdf_files(daily_writes)
             ds.close()
 
             for orig_file in year_files:
@@ -58,6 +58,12 @@ def create_get_args() -> object:
                     default=93,
                     type=int)
 
+    ap.add_argument("-io",
+                    "--io-dtype",
+                    help="Precision to store input channels at in tfrecords",
+                    choices=("float32", "float16", "bfloat16"),
+                    default="float32",
+                    dest="io_dtype")
     ap.add_argument("-i",
                     "--implementation",
                     type=str,
@@ -117,6 +123,7 @@ def create():
         output_batch_size=args.batch_size,
         pickup=args.pickup,
         generate_workers=args.workers,
+        io_dtype=args.io_dtype,
         dask_port=args.dask_port,
         futures_per_worker=args.futures)
 
@@ -23,6 +23,8 @@ class IceNetBaseDataLoader(Generator):
     :param var_lag,
     :param dataset_config_path:
     :param generate_workers:
+    :param io_dtype: precision in which input channels are stored in
+        tfrecords, float32 or a reduced float type (float16, bfloat16)
     :param loss_weight_days:
     :param n_forecast_days:
     :param output_batch_size:
@@ -39,6 +41,7 @@ class IceNetBaseDataLoader(Generator):
                  dates_override: object = None,
                  dry: bool = False,
                  generate_workers: int = 8,
+                 io_dtype: str = "float32",
                  loss_weight_days: bool = True,
                  n_forecast_days: int = 93,
                  output_batch_size: int = 32,
@@ -56,6 +59,7 @@ class IceNetBaseDataLoader(Generator):
         self._dates_override = dates_override
         self._config = dict()
         self._dry = dry
+        self._io_dtype = io_dtype
         self._loss_weight_days = loss_weight_days
         self._meta_channels = []
         self._missing_dates = []
@@ -280,6 +284,7 @@ class IceNetBaseDataLoader(Generator):
             ],
             "counts": counts,
             "dtype": self._dtype.__name__,
+            "io_dtype": self._io_dtype,
             "loader_config": os.path.abspath(self._configuration_path),
             "missing_dates": [
                 date.strftime(IceNetPreProcessor.DATE_FORMAT)
@@ -208,7 +208,8 @@ class DaskMultiWorkerLoader(DaskBaseDataLoader):
                                         self.get_sample_files(),
                                         dates,
                                         args,
-                                        dry=self._dry)
+                                        dry=self._dry,
+                                        io_dtype=self._io_dtype)
                     futures.append(fut)
 
                     # Use this to limit the future list, to avoid crashing the
@@ -292,7 +293,8 @@ def generate_and_write(path: str,
                        var_files: object,
                        dates: object,
                        args: tuple,
-                       dry: bool = False):
+                       dry: bool = False,
+                       io_dtype: str = "float32"):
     """
 
     :param path:
@@ -300,6 +302,7 @@ def generate_and_write(path: str,
     :param dates:
     :param args:
     :param dry:
+    :param io_dtype:
     :return:
     """
     count = 0
@@ -346,7 +349,11 @@ def generate_and_write(path: str,
                                                         y,
                                                         sample_weights,
                                                         optimize_graph=True)
-                    write_tfrecord(writer, x, y, sample_weights)
+                    write_tfrecord(writer,
+                                   x,
+                                   y,
+                                   sample_weights,
+                                   io_dtype=io_dtype)
                 count += 1
             except IceNetDataWarning:
                 continue
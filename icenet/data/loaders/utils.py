@@ -8,15 +8,19 @@ class IceNetDataWarning(RuntimeWarning):
     pass
 
 
-def write_tfrecord(writer: object, x: object, y: object,
-                   sample_weights: object):
+def write_tfrecord(writer: object,
+                   x: object,
+                   y: object,
+                   sample_weights: object,
+                   io_dtype: str = "float32"):
     """
 
     :param writer:
     :param x:
     :param y:
     :param sample_weights:
-    :param data_check:
+    :param io_dtype: if not float32, inputs are cast to this type and stored
+        as a serialised tensor, outputs and weights remain float32
     """
 
     # FIXME: this will trigger eager computation of the dataset, should be
@@ -37,11 +41,20 @@ def write_tfrecord(writer: object, x: object, y: object,
 
     #        if data_check and x_nans > 0:
 
+    if io_dtype == "float32":
+        x_feature = tf.train.Feature(float_list=tf.train.FloatList(
+            value=x.reshape(-1)))
+    else:
+        # FloatList is always 32-bit, so reduced precision inputs are stored
+        # as bytes and cast back by the decoder
+        x_feature = tf.train.Feature(bytes_list=tf.train.BytesList(value=[
+            tf.io.serialize_tensor(tf.cast(x, getattr(tf, io_dtype))).numpy()
+        ]))
+
     record_data = tf.train.Example(features=tf.train.Features(
         feature={
             "x":
-                tf.train.Feature(float_list=tf.train.FloatList(
-                    value=x.reshape(-1))),
+                x_feature,
             "y":
                 tf.train.Feature(float_list=tf.train.FloatList(
                     value=y.reshape(-1))),
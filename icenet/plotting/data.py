@@ -41,8 +41,11 @@ def plot_tfrecord():
     config = json.load(args.configuration)
     args.configuration.close()
 
-    decoder = get_decoder(tuple(config['shape']), config['num_channels'],
-                          config['n_forecast_days'])
+    decoder = get_decoder(tuple(config['shape']),
+                          config['num_channels'],
+                          config['n_forecast_days'],
+                          dtype=config['dtype'],
+                          io_dtype=config.get('io_dtype', "float32"))
 
     ds = ds.map(decoder).batch(1)
     it = ds.as_numpy_iterator()
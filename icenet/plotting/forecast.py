@@ -28,7 +28,8 @@ from icenet.plotting.utils import (filter_ds_by_obs, get_forecast_ds,
                                    get_seas_forecast_init_dates, show_img,
                                    get_plot_axes, process_probes,
                                    process_regions)
-from icenet.plotting.video import xarray_to_video
+from icenet.plotting.video import FFMPEG_ARGS, use_file_backend, \
+    xarray_to_video
 
 
 def parse_location_or_region(argument: str):
@@ -1098,26 +1099,41 @@ def plot_metrics_leadtime_avg(metric: str,
     return fc_metric_df, seas_metric_df
 
 
-def sic_error_video(fc_da: object, obs_da: object, land_mask: object,
-                    output_path: object) -> object:
+def sic_error_video(fc_da: object,
+                    obs_da: object,
+                    land_mask: object,
+                    output_path: object,
+                    dpi: int = 100) -> object:
     """
 
     :param fc_da:
     :param obs_da:
     :param land_mask:
     :param output_path:
+    :param dpi: resolution of the rendered frames, with the 16x6 inch figure
+        the default gives 1600x600 video
 
     :return: matplotlib animation
     """
 
-    diff = fc_da - obs_da
-    fig, maps = plt.subplots(nrows=1, ncols=3, figsize=(16, 6), layout="tight")
-    fig.set_dpi(150)
+    # Materialise every frame up front, so each frame is a NumPy slice rather
+    # than a lazy selection
+    fc_arr = fc_da.transpose("time", ...).to_numpy()
+    obs_arr = obs_da.transpose("time", ...).to_numpy()
+    diff_arr = fc_arr - obs_arr
+    fc_dates = pd.to_datetime(fc_da.time.values).strftime("%d/%m/%Y")
+    obs_dates = pd.to_datetime(obs_da.time.values).strftime("%d/%m/%Y")
+
+    fig, maps = plt.subplots(nrows=1,
+                             ncols=3,
+                             figsize=(16, 6),
+                             dpi=dpi,
+                             layout="tight")
 
     leadtime = 0
-    fc_plot = fc_da.isel(time=leadtime).to_numpy()
-    obs_plot = obs_da.isel(time=leadtime).to_numpy()
-    diff_plot = diff.isel(time=leadtime).to_numpy()
+    fc_plot = fc_arr[leadtime]
+    obs_plot = obs_arr[leadtime]
+    diff_plot = diff_arr[leadtime]
 
     upper_bound = np.max(
         [np.abs(np.min(diff_plot)),
@@ -1138,14 +1154,8 @@ def sic_error_video(fc_da: object, obs_da: object, land_mask: object,
                          vmax=diff_vmax,
                          cmap=diff_cmap)
 
-    tic = maps[0].set_title(
-        "IceNet "
-        f"{pd.to_datetime(fc_da.isel(time=leadtime).time.values).strftime('%d/%m/%Y')}"
-    )
-    tio = maps[1].set_title(
-        "OSISAF Obs "
-        f"{pd.to_datetime(obs_da.isel(time=leadtime).time.values).strftime('%d/%m/%Y')}"
-    )
+    tic = maps[0].set_title("IceNet {}".format(fc_dates[leadtime]))
+    tio = maps[1].set_title("OSISAF Obs {}".format(obs_dates[leadtime]))
     maps[2].set_title("Diff")
 
     p0 = maps[0].get_position().get_points().flatten()
@@ -1158,39 +1168,37 @@ def sic_error_video(fc_da: object, obs_da: object, land_mask: object,
     ax_cbar1 = fig.add_axes([p2[0] + 0.05, 0.04, p2[2] - p2[0], 0.02])
     plt.colorbar(im3, orientation='horizontal', cax=ax_cbar1)
 
+    # Without blitting every artist is redrawn per frame, so the land is an
+    # image overlay rather than a set of filled contour paths
+    land_overlay = np.ma.masked_where(~np.asarray(land_mask, dtype=bool),
+                                      land_mask)
+    land_cmap = mpl.colors.ListedColormap([mpl.cm.gray(180)])
+
     for m_ax in maps[0:3]:
         m_ax.tick_params(
             labelbottom=False,
             labelleft=False,
         )
-        m_ax.contourf(land_mask,
-                      levels=[.5, 1],
-                      colors=[mpl.cm.gray(180)],
-                      zorder=3)
+        m_ax.imshow(land_overlay,
+                    cmap=land_cmap,
+                    interpolation="nearest",
+                    zorder=3)
 
     def update(date):
         logging.debug(f"Plotting {date}")
 
-        fc_plot = fc_da.isel(time=date).to_numpy()
-        obs_plot = obs_da.isel(time=date).to_numpy()
-        diff_plot = diff.isel(time=date).to_numpy()
-
-        tic.set_text("IceNet {}".format(
-            pd.to_datetime(
-                fc_da.isel(time=date).time.values).strftime("%d/%m/%Y")))
-        tio.set_text("OSISAF Obs {}".format(
-            pd.to_datetime(
-                obs_da.isel(time=date).time.values).strftime("%d/%m/%Y")))
+        tic.set_text("IceNet {}".format(fc_dates[date]))
+        tio.set_text("OSISAF Obs {}".format(obs_dates[date]))
 
-        im1.set_data(fc_plot)
-        im2.set_data(obs_plot)
-        im3.set_data(diff_plot)
+        im1.set_data(fc_arr[date])
+        im2.set_data(obs_arr[date])
+        im3.set_data(diff_arr[date])
 
         return tic, tio, im1, im2, im3
 
     animation = FuncAnimation(fig,
                               update,
-                              range(0, len(fc_da.time)),
+                              range(0, len(fc_arr)),
                               interval=100)
 
     plt.close()
@@ -1198,7 +1206,7 @@ def sic_error_video(fc_da: object, obs_da: object, land_mask: object,
     output_path = os.path.join("plot", "sic_error.mp4") \
         if not output_path else output_path
     logging.info(f"Saving to {output_path}")
-    animation.save(output_path, fps=10, extra_args=['-vcodec', 'libx264'])
+    animation.save(output_path, fps=10, extra_args=FFMPEG_ARGS)
     return animation
 
 
@@ -1809,6 +1817,7 @@ def sic_error():
     """
     ap = ForecastPlotArgParser()
     args = ap.parse_args()
+    use_file_backend()
 
     masks = Masks(north=args.hemisphere == "north",
                   south=args.hemisphere == "south")
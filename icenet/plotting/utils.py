@@ -1,16 +1,50 @@
 import datetime as dt
-import glob
 import logging
 import os
 import re
 
+from functools import lru_cache, partial
+from operator import itemgetter
+
 import cartopy.crs as ccrs
+import dask
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import xarray as xr
 
 from ibicus.debias import LinearScaling
+from matplotlib.colors import Normalize
+
+# The files read here are produced as netCDF4/HDF5 by icenet, so we use
+# h5netcdf directly, which avoids netCDF4's per-file format probing. This
+# relies on the h5netcdf pin in requirements.txt, as later releases aren't
+# compatible with our xarray pin
+NETCDF_ENGINE = "h5netcdf"
+
+# Opens (and preprocessing) are dispatched via dask.delayed, and we avoid
+# comparing coordinates across files that are known to share a grid
+MFDATASET_KWARGS = dict(
+    engine=NETCDF_ENGINE,
+    parallel=True,
+    combine="by_coords",
+    data_vars="minimal",
+    coords="minimal",
+    compat="override",
+)
+
+# Spatial chunking for bias correction: time must be a single chunk as it's
+# the core dimension that the debiaser operates along
+DEBIAS_CHUNKS = dict(time=-1, yc=108, xc=108)
+
+# EASE-Grid 2.0 extents: half the grid width (to pixel centres) and pixel
+# size, in metres, plus the grid width in pixels
+EXTENT_BASE = 5387500
+PIXEL_SIZE = 25000
+GRID_SIZE = 432
+
+# SEAS forecast files are named by initialisation date, YYYYMMDD.nc
+_SEAS_FILE_RE = re.compile(r'^\d{8}\.nc$')
 
 
 def broadcast_forecast(start_date: object,
@@ -88,6 +122,105 @@ def broadcast_forecast(start_date: object,
     return target_ds
 
 
+def strip_overlapping_time(ds: object, max_dates: dict) -> object:
+    """Preprocessor stripping a SEAS file back to the start of its successor
+
+    This is module level (and bound via functools.partial) rather than a
+    closure so that it can be pickled by the dask scheduler when opening
+    files in parallel.
+
+    :param ds: dataset opened by xr.open_mfdataset
+    :param max_dates: dict of absolute path -> last date to retain, which is
+        None for the final file
+    :return: the stripped dataset
+    """
+    data_file = os.path.abspath(ds.encoding["source"])
+
+    if data_file not in max_dates:
+        logging.error("\n{} not in \n\n{}".format(data_file,
+                                                    list(max_dates.keys())))
+        return None
+
+    max_date = max_dates[data_file]
+
+    # This is called for every file, so avoid formatting discarded messages
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+    if max_date is not None:
+        if debug:
+            logging.debug("Stripping {} to {}".format(data_file, max_date))
+        return ds.sel(time=slice(None, max_date))
+    else:
+        if debug:
+            logging.debug("Not stripping {}".format(data_file))
+        return ds
+
+
+@lru_cache(maxsize=8)
+def _scan_seas_files(directory: str, mtime: int) -> tuple:
+    """Lists SEAS forecast files in a directory, cached between calls
+
+    The modification time of the directory is part of the cache key, so
+    that files being added or removed invalidates the cached listing.
+
+    :param directory: directory containing YYYYMMDD.nc files
+    :param mtime: modification time of the directory, for cache invalidation
+    :return: tuple of (init date, absolute path) pairs, sorted by date
+    """
+    with os.scandir(directory) as it:
+        entries = [(dt.datetime(int(entry.name[0:4]),
+                                int(entry.name[4:6]),
+                                int(entry.name[6:8])),
+                    os.path.abspath(entry.path))
+                   for entry in it
+                   if _SEAS_FILE_RE.match(entry.name)]
+
+    entries.sort(key=itemgetter(0))
+    return tuple(entries)
+
+
+def list_seas_files(hemisphere: str, source_path: object) -> tuple:
+    """
+
+    :param hemisphere: string, typically either 'north' or 'south'
+    :param source_path: path where north and south SEAS forecasts are stored
+    :return: tuple of (init date, absolute path) pairs, sorted by date
+    """
+    directory = os.path.abspath(os.path.join(source_path, hemisphere,
+                                             "siconca"))
+    return _scan_seas_files(directory, os.stat(directory).st_mtime_ns)
+
+
+def get_required_variables(ds: object, var_name: str) -> list:
+    """Lists the variables needed to read var_name from an undecoded dataset
+
+    This is the variable itself, plus the dimensions and coordinates it
+    refers to, allowing everything else to be skipped when CF decoding.
+
+    :param ds: dataset opened with decode_cf=False
+    :param var_name: the variable to retain
+    :return: list of variable names
+    """
+    var = ds[var_name]
+    keep = set(var.dims) | {var_name} | \
+        set(var.attrs.get("coordinates", "").split()) | \
+        set(var.attrs.get("grid_mapping", "").split())
+    return [v for v in ds.variables if v in keep]
+
+
+@lru_cache(maxsize=8)
+def get_unneeded_variables(path: str, var_name: str) -> tuple:
+    """Lists variables in a file that aren't needed to read var_name
+
+    :param path: a netCDF file representative of the files to be opened
+    :param var_name: the variable to retain
+    :return: tuple of variable names suitable for drop_variables
+    """
+    with xr.open_dataset(path, decode_cf=False, engine=NETCDF_ENGINE) as ds:
+        keep = get_required_variables(ds, var_name)
+        return tuple(v for v in ds.variables if v not in keep)
+
+
 def get_seas_forecast_init_dates(
     hemisphere: str,
     source_path: object = os.path.join(".", "data", "mars.seas")
@@ -104,7 +237,7 @@ def get_seas_forecast_init_dates(
     filenames = os.listdir(os.path.join(source_path, hemisphere, "siconca"))
     # obtain the dates from files with YYYYMMDD.nc format
     return pd.to_datetime(
-        [x.split('.')[0] for x in filenames if re.search(r'^\d{8}\.nc$', x)])
+        [x.split('.')[0] for x in filenames if _SEAS_FILE_RE.match(x)])
 
 
 def get_seas_forecast_da(
@@ -132,7 +265,11 @@ Coordinates:
         "{}.nc".format(date.replace(day=1).strftime("%Y%m%d")))
 
     if os.path.exists(seas_file):
-        seas_da = xr.open_dataset(seas_file).siconc
+        seas_ds = xr.open_dataset(seas_file,
+                                  decode_cf=False,
+                                  engine=NETCDF_ENGINE)
+        seas_da = xr.decode_cf(
+            seas_ds[get_required_variables(seas_ds, "siconc")]).siconc
     else:
         logging.warning("No SEAS data available at {}".format(seas_file))
         return None
@@ -142,53 +279,84 @@ Coordinates:
         (start_date, end_date) = (date - dt.timedelta(days=10 * 365),
                                   date + dt.timedelta(days=10 * 365))
         obs_da = get_obs_da(hemisphere, start_date, end_date)
-        seas_hist_files = dict(
-            sorted({
-                os.path.abspath(el):
-                    dt.datetime.strptime(os.path.basename(el)[0:8], "%Y%m%d")
-                for el in glob.glob(
-                    os.path.join(source_path, hemisphere, "siconca", "*.nc"))
-                if re.search(r'^\d{8}\.nc$', os.path.basename(el)) and
-                el != seas_file
-            }.items()))
-
-        def strip_overlapping_time(ds):
-            data_file = os.path.abspath(ds.encoding["source"])
-
-            try:
-                idx = list(seas_hist_files.keys()).index(data_file)
-            except ValueError:
-                logging.exception("\n{} not in \n\n{}".format(
-                    data_file, seas_hist_files))
-                return None
-
-            if idx < len(seas_hist_files) - 1:
-                max_date = seas_hist_files[
-                               list(seas_hist_files.keys())[idx + 1]] \
-                           - dt.timedelta(days=1)
-                logging.debug("Stripping {} to {}".format(data_file, max_date))
-                return ds.sel(time=slice(None, max_date))
-            else:
-                logging.debug("Not stripping {}".format(data_file))
-                return ds
+        seas_file_path = os.path.abspath(seas_file)
+        hist_entries = [
+            (init_date, path)
+            for init_date, path in list_seas_files(hemisphere, source_path)
+            if path != seas_file_path
+        ]
+        hist_paths = [path for _, path in hist_entries]
+
+        if not len(hist_paths):
+            raise RuntimeError("No SEAS hindcast data available in {} to bias "
+                               "correct {} against".format(
+                                   os.path.dirname(seas_file_path), seas_file))
+
+        # Precompute the cutoff for each file once, rather than scanning the
+        # file list for every file opened
+        max_dates = {path: None for path in hist_paths}
+        max_dates.update({
+            path: hist_entries[idx + 1][0] - dt.timedelta(days=1)
+            for idx, (_, path) in enumerate(hist_entries[:-1])
+        })
 
-        hist_da = xr.open_mfdataset(seas_hist_files,
-                                    preprocess=strip_overlapping_time).siconc
+        hist_da = xr.open_mfdataset(
+            hist_paths,
+            preprocess=partial(strip_overlapping_time, max_dates=max_dates),
+            drop_variables=get_unneeded_variables(hist_paths[0], "siconc"),
+            **MFDATASET_KWARGS).siconc
         debiaser = LinearScaling(delta_type="additive",
                                  variable="siconc",
                                  reasonable_physical_range=[0., 1.])
 
-        logging.info("Debiaser input ranges: obs {:.2f} - {:.2f}, "
-                     "hist {:.2f} - {:.2f}, fut {:.2f} - {:.2f}".format(
-                         float(obs_da.min()), float(obs_da.max()),
-                         float(hist_da.min()), float(hist_da.max()),
-                         float(seas_da.min()), float(seas_da.max())))
-
-        seas_array = debiaser.apply(obs_da.values, hist_da.values,
-                                    seas_da.values)
-        seas_da.values = seas_array
-        logging.info("Debiaser output range: {:.2f} - {:.2f}".format(
-            float(seas_da.min()), float(seas_da.max())))
+        # The range reductions each mean a pass over the data, so only do
+        # them when they're going to be logged
+        log_ranges = logging.getLogger().isEnabledFor(logging.INFO)
+
+        if log_ranges:
+            logging.info("Debiaser input ranges: obs {:.2f} - {:.2f}, "
+                         "hist {:.2f} - {:.2f}, fut {:.2f} - {:.2f}".format(
+                             *map(float, dask.compute(
+                                 obs_da.min(), obs_da.max(),
+                                 hist_da.min(), hist_da.max(),
+                                 seas_da.min(), seas_da.max()))))
+
+        def debias_chunk(fut, obs, hist):
+            # apply_ufunc moves the core (time) dimension last, whereas
+            # ibicus expects time leading. The axis moves are views, and the
+            # cast only copies if ibicus didn't preserve the forecast dtype
+            return np.moveaxis(
+                debiaser.apply(np.moveaxis(obs, -1, 0),
+                               np.moveaxis(hist, -1, 0),
+                               np.moveaxis(fut, -1, 0)),
+                0, -1).astype(fut.dtype, copy=False)
+
+        # LinearScaling is a per-cell operation, so we can stream spatial
+        # chunks through it rather than loading everything. The time
+        # dimensions of each input differ, so they're renamed to avoid
+        # apply_ufunc trying to align them
+        seas_da = xr.apply_ufunc(
+            debias_chunk,
+            seas_da.chunk(DEBIAS_CHUNKS),
+            obs_da.reset_coords(drop=True).chunk(DEBIAS_CHUNKS).rename(
+                time="obs_time").drop_vars("obs_time"),
+            hist_da.reset_coords(drop=True).chunk(DEBIAS_CHUNKS).rename(
+                time="hist_time").drop_vars("hist_time"),
+            input_core_dims=[["time"], ["obs_time"], ["hist_time"]],
+            output_core_dims=[["time"]],
+            dask="parallelized",
+            join="override",
+            keep_attrs=True,
+            output_dtypes=[seas_da.dtype]).transpose(*seas_da.dims)
+
+        # The corrected forecast is only a single initialisation, so hold it
+        # in memory: otherwise the range reduction below and every later use
+        # by the caller would re-read and re-correct the whole history
+        seas_da = seas_da.persist()
+
+        if log_ranges:
+            logging.info("Debiaser output range: {:.2f} - {:.2f}".format(
+                *map(float, dask.compute(seas_da.min(), seas_da.max()))))
 
     logging.info("Returning SEAS data from {} from {}".format(seas_file, date))
 
@@ -242,20 +410,22 @@ def filter_ds_by_obs(ds: object, obs_da: object, forecast_date: str) -> object:
     (start_date,
      end_date) = (forecast_date + dt.timedelta(days=int(ds.leadtime.min())),
                   forecast_date + dt.timedelta(days=int(ds.leadtime.max())))
+    # The cached pandas index, avoiding copying the coordinate
+    obs_times = obs_da.indexes["time"]
+    n_obs = len(obs_times)
 
-    if len(obs_da.time) < len(ds.leadtime):
-        if len(obs_da.time) < 1:
+    if n_obs < len(ds.leadtime):
+        if n_obs < 1:
             raise RuntimeError("No observational data available between {} "
                                "and {}".format(start_date.strftime("%D"),
                                                end_date.strftime("%D")))
 
         logging.warning("Observational data not available for full range of "
                         "forecast lead times: {}-{} vs {}-{}".format(
-                            obs_da.time.to_series()[0].strftime("%D"),
-                            obs_da.time.to_series()[-1].strftime("%D"),
+                            obs_times[0].strftime("%D"),
+                            obs_times[-1].strftime("%D"),
                             start_date.strftime("%D"), end_date.strftime("%D")))
-        (start_date, end_date) = (obs_da.time.to_series()[0],
-                                  obs_da.time.to_series()[-1])
+        (start_date, end_date) = (obs_times[0], obs_times[-1])
 
     # We broadcast to get a nicely compatible dataset for plotting
     return broadcast_forecast(start_date=start_date,
@@ -278,9 +448,18 @@ def get_obs_da(
     :return:
     """
     obs_years = pd.Series(pd.date_range(start_date, end_date)).dt.year.unique()
+    obs_dir = os.path.join(obs_source, hemisphere, "siconca")
+
+    # A single listing of the directory, rather than a glob per year
+    with os.scandir(obs_dir) as it:
+        present = {
+            entry.name: entry.path for entry in it if entry.name.endswith(".nc")
+        }
+
     obs_dfs = [
-        el for yr in obs_years for el in glob.glob(
-            os.path.join(obs_source, hemisphere, "siconca", "{}.nc".format(yr)))
+        present["{}.nc".format(yr)]
+        for yr in obs_years
+        if "{}.nc".format(yr) in present
     ]
 
     if len(obs_dfs) < len(obs_years):
@@ -289,12 +468,30 @@ def get_obs_da(
                 start_date, end_date, obs_source))
 
     logging.info("Got files: {}".format(obs_dfs))
-    obs_ds = xr.open_mfdataset(obs_dfs)
+    # One chunk per yearly file, so selections only read the years needed
+    obs_ds = xr.open_mfdataset(obs_dfs,
+                               chunks=dict(time=366),
+                               **MFDATASET_KWARGS)
     obs_ds = obs_ds.sel(time=slice(start_date, end_date))
 
     return obs_ds.ice_conc
 
 
+@lru_cache(maxsize=None)
+def get_hemisphere_crs(north: bool = True) -> object:
+    """Lambert azimuthal equal-area projection for a hemisphere
+
+    Cached, as constructing projections is relatively expensive and they
+    are requested for every plot (and frame) generated.
+
+    :param north: north (True) or south (False) pole centred projection
+    :return: the cartopy CRS
+    """
+    pole = 1 if north else -1
+    return ccrs.LambertAzimuthalEqualArea(0, pole * 90)
+
+
+@lru_cache(maxsize=32)
 def calculate_extents(x1: int, x2: int, y1: int, y2: int):
     """
 
@@ -304,14 +501,12 @@ def calculate_extents(x1: int, x2: int, y1: int, y2: int):
     :param y2:
     :return:
     """
-    data_extent_base = 5387500
-
-    extents = [
-        -data_extent_base + (x1 * 25000),
-        data_extent_base - ((432 - x2) * 25000),
-        -data_extent_base + (y1 * 25000),
-        data_extent_base - ((432 - y2) * 25000),
-    ]
+    extents = (
+        -EXTENT_BASE + x1 * PIXEL_SIZE,
+        EXTENT_BASE - (GRID_SIZE - x2) * PIXEL_SIZE,
+        -EXTENT_BASE + y1 * PIXEL_SIZE,
+        EXTENT_BASE - (GRID_SIZE - y2) * PIXEL_SIZE,
+    )
 
     logging.debug("Data extents: {}".format(extents))
     return extents
@@ -340,8 +535,7 @@ def get_plot_axes(x1: int = 0,
     fig = plt.figure(figsize=(10, 8), dpi=150, layout='tight')
 
     if do_coastlines:
-        pole = 1 if north else -1
-        proj = ccrs.LambertAzimuthalEqualArea(0, pole * 90)
+        proj = get_hemisphere_crs(north)
         ax = fig.add_subplot(1, 1, 1, projection=proj)
         extents = calculate_extents(x1, x2, y1, y2)
         ax.set_extent(extents, crs=proj)
@@ -362,7 +556,8 @@ def show_img(ax,
              vmin: float = 0.,
              vmax: float = 1.,
              north: bool = True,
-             south: bool = False):
+             south: bool = False,
+             interpolation: str = "nearest"):
     """
 
     :param ax:
@@ -377,24 +572,29 @@ def show_img(ax,
     :param vmax:
     :param north:
     :param south:
+    :param interpolation: defaults to nearest, avoiding a resampling pass
     :return:
     """
 
     assert north ^ south, "One hemisphere only must be selected"
 
+    norm = Normalize(vmin=vmin, vmax=vmax)
+
     if do_coastlines:
-        pole = 1 if north else -1
-        data_crs = ccrs.LambertAzimuthalEqualArea(0, pole * 90)
+        data_crs = get_hemisphere_crs(north)
         extents = calculate_extents(x1, x2, y1, y2)
         im = ax.imshow(arr,
-                       vmin=vmin,
-                       vmax=vmax,
+                       norm=norm,
                        cmap=cmap,
+                       interpolation=interpolation,
                        transform=data_crs,
                        extent=extents)
         ax.coastlines()
     else:
-        im = ax.imshow(arr, cmap=cmap, vmin=vmin, vmax=vmax)
+        im = ax.imshow(arr,
+                       norm=norm,
+                       cmap=cmap,
+                       interpolation=interpolation)
 
     return im
 
@@ -437,5 +637,5 @@ def process_regions(region: tuple, data: tuple) -> tuple:
 
     for idx, arr in enumerate(data):
         if arr is not None:
-            data[idx] = arr[..., (432 - y2):(432 - y1), x1:x2]
+            data[idx] = arr[..., (GRID_SIZE - y2):(GRID_SIZE - y1), x1:x2]
     return data
@@ -17,6 +17,23 @@ from mpl_toolkits.axes_grid1 import make_axes_locatable
 from icenet.process.predict import get_refcube
 from icenet.utils import setup_logging
 
+# libx264's default "medium" preset dominates the time taken to write a video.
+# Threading is left to ffmpeg, as video_process writes videos concurrently
+FFMPEG_ARGS = [
+    '-vcodec', 'libx264', '-preset', 'ultrafast', '-crf', '23', '-pix_fmt',
+    'yuv420p'
+]
+
+
+def use_file_backend():
+    """Switches pyplot to Agg for CLIs that only write videos to file
+
+    Frames are then drawn without the event loop of an interactive backend.
+    This is deliberately not done at import, so notebook users keep their own
+    backend.
+    """
+    plt.switch_backend("Agg")
+
 
 # TODO: This can be a plotting or analysis util function elsewhere
 def get_dataarray_from_files(files: object, numpy: bool = False) -> object:
@@ -202,7 +219,7 @@ def xarray_to_video(
         logging.info("Not saving plot, will return animation")
     else:
         logging.info("Saving plot to {}".format(video_path))
-        animation.save(video_path, fps=fps, extra_args=['-vcodec', 'libx264'])
+        animation.save(video_path, fps=fps, extra_args=FFMPEG_ARGS)
     return animation
 
 
@@ -321,6 +338,7 @@ def data_cli():
 
     """
     args = cli_args()
+    use_file_backend()
 
     hemis = [args.hemisphere] if len(args.hemisphere) else ["north", "south"]
     logging.info("Looking into {}".format(args.path))
@@ -0,0 +1,39 @@
+"""Tests for writing and decoding tfrecords"""
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from icenet.data.datasets.utils import get_decoder
+from icenet.data.loaders.utils import write_tfrecord
+
+SHAPE = (4, 4)
+CHANNELS = 3
+FORECASTS = 2
+
+
+@pytest.mark.parametrize("io_dtype", ["float32", "float16", "bfloat16"])
+def test_tfrecord_round_trip(tmp_path, io_dtype):
+    """Check records written with io_dtype decode to the original sample"""
+    rng = np.random.default_rng(42)
+    x = rng.random((*SHAPE, CHANNELS), dtype=np.float32)
+    y = rng.random((*SHAPE, FORECASTS, 1), dtype=np.float32)
+    sample_weights = rng.random((*SHAPE, FORECASTS, 1), dtype=np.float32)
+
+    path = str(tmp_path / "00000000.tfrecord")
+
+    with tf.io.TFRecordWriter(path) as writer:
+        write_tfrecord(writer, x, y, sample_weights, io_dtype=io_dtype)
+
+    decoder = get_decoder(SHAPE, CHANNELS, FORECASTS, io_dtype=io_dtype)
+    x_out, y_out, sw_out = next(
+        tf.data.TFRecordDataset([path]).map(decoder).as_numpy_iterator())
+
+    assert x_out.dtype == np.float32
+    assert x_out.shape == x.shape
+    # bfloat16 keeps 8 bits of mantissa, so values in [0, 1) are within 2^-8
+    np.testing.assert_allclose(x_out,
+                               x,
+                               atol=0 if io_dtype == "float32" else 2**-8)
+    np.testing.assert_array_equal(y_out, y)
+    np.testing.assert_array_equal(sw_out, sample_weights)